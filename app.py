@@ -1,13 +1,56 @@
-from fastapi import FastAPI, HTTPException, Body
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Body
 from fastapi.responses import JSONResponse, StreamingResponse
-from dotenv import load_dotenv
-from chat_agent.graph import run_chat_agent
+from chat_agent.graph import run_chat_agent, drain_background_tasks
 from chat_agent.models import ChatAIRequest
+from chat_agent.db_helper import get_pool, close_pool
+from chat_agent.config import get_settings
+from chat_agent.utils import load_encoding
 from chat_agent.logger import logger
 
-load_dotenv()
 
-app = FastAPI(title="Longevity Chat Agent")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # tiktoken may download its BPE file with a blocking request, so keep it off the loop
+    await asyncio.to_thread(load_encoding)
+
+    # Open the pool up front so the first request doesn't pay for the connections
+    try:
+        await get_pool()
+    except Exception:
+        logger.exception("lifespan: could not open the chat history pool; retrying on first use")
+
+    yield
+
+    # Let queued chat history writes finish before their pool goes away
+    await drain_background_tasks(get_settings().shutdown_timeout_seconds)
+    await close_pool()
+
+
+app = FastAPI(title="Longevity Chat Agent", lifespan=lifespan)
+
+# Keep proxies (e.g. nginx) and browsers from buffering or caching the event stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive",
+}
+
+# Validation error payloads are constant, so build them once
+USER_QUERY_NOT_PROVIDED = {
+    "error": {
+        "code": "USER_QUERY_NOT_PROVIDED",
+        "message": "Please provide a valid user query.",
+    }
+}
+USER_ID_NOT_PROVIDED = {
+    "error": {
+        "code": "USER_ID_NOT_PROVIDED",
+        "message": "Please provide a valid user id.",
+    }
+}
 
 #example request
 # {
@@ -21,35 +64,20 @@ app = FastAPI(title="Longevity Chat Agent")
 async def chat_with_ai_agent(request: ChatAIRequest = Body(...)):
     try:
         if not request.user_query or request.user_query.strip() == "":
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": {
-                        "code": "USER_QUERY_NOT_PROVIDED",
-                        "message": "Please provide a valid user query.",
-                    }
-                },
-            )
+            return JSONResponse(status_code=400, content=USER_QUERY_NOT_PROVIDED)
 
         if not request.user_id or request.user_id.strip() == "":
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": {
-                        "code": "USER_ID_NOT_PROVIDED",
-                        "message": "Please provide a valid user id.",
-                    }
-                },
-            )
+            return JSONResponse(status_code=400, content=USER_ID_NOT_PROVIDED)
 
         if request.enable_streaming:
             return StreamingResponse(
-                run_chat_agent(request.user_query, request.user_id, request.session_id, True),
+                await run_chat_agent(request.user_query, request.user_id, request.session_id, True),
                 status_code=200,
                 media_type="text/event-stream",
+                headers=SSE_HEADERS,
             )
         else:
-            response = run_chat_agent(request.user_query, request.user_id, request.session_id, False)
+            response = await run_chat_agent(request.user_query, request.user_id, request.session_id, False)
             if response.get("error"):
                 return JSONResponse(status_code=400, content={"error": response.get("error")})
             return JSONResponse(status_code=200, content=response)
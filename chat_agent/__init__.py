@@ -1,2 +1,2 @@
 # chat_agent package
-__all__ = ["graph", "graph_state", "db_helper", "llm", "models", "prompts", "tools", "utils", "logger"]
+__all__ = ["cache", "config", "graph", "graph_state", "db_helper", "llm", "models", "prompts", "tools", "utils", "logger"]
@@ -0,0 +1,161 @@
+"""
+chat_agent/cache.py
+
+In-memory response caches placed in front of the LLM calls.
+Includes:
+- LLMResponseCache: exact-match cache keyed by a BLAKE2b digest of the prompt inputs
+- SemanticQueryCache: embedding-similarity cache for general knowledge answers
+"""
+
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+from langchain_openai import OpenAIEmbeddings
+
+from chat_agent.logger import logger
+from chat_agent.config import get_settings
+
+
+# ============================================================
+# Exact-match Cache
+# ============================================================
+
+
+class LLMResponseCache:
+    """
+    Exact-match LRU cache with a TTL, keyed by a 128-bit BLAKE2b digest of the prompt parts.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        settings = get_settings()
+        self.ttl_seconds = ttl_seconds or settings.cache_ttl_seconds
+        self.max_entries = max_entries or settings.cache_max_entries
+        self._entries: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+
+    @staticmethod
+    def make_key(*parts: str) -> bytes:
+        """Builds a compact cache key from the strings that fully determine the LLM output."""
+        return hashlib.blake2b("\x00".join(parts).encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Returns the cached value for `key`, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: bytes, value: Any) -> None:
+        """Stores `value` under `key`, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# ============================================================
+# Semantic Cache
+# ============================================================
+
+
+class SemanticQueryCache:
+    """
+    Similarity cache mapping query embeddings to previously generated answers.
+    A lookup hits when the cosine similarity to a stored query reaches the threshold.
+
+    Embeddings live in one preallocated float32 matrix used as a ring buffer, so a
+    lookup scores every entry with a single matrix-vector product.
+
+    Concurrent `embed` calls are coalesced: texts queued while an embeddings request
+    is in flight are sent together in the next request instead of one call each.
+    """
+
+    # OpenAI accepts up to 2048 inputs per embeddings request
+    MAX_BATCH_SIZE = 2048
+
+    def __init__(
+        self,
+        embeddings: Optional[OpenAIEmbeddings] = None,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.embeddings = embeddings or OpenAIEmbeddings(
+            api_key=settings.openai_api_key,
+            model=settings.openai_embedding_model,
+        )
+        self.threshold = threshold or settings.semantic_cache_threshold
+        self.ttl_seconds = ttl_seconds or settings.cache_ttl_seconds
+        self.max_entries = max_entries or settings.cache_max_entries
+        # Allocated on the first add, once the embedding dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._expires_at = np.full(self.max_entries, -np.inf)
+        self._answers: list[Optional[str]] = [None] * self.max_entries
+        self._next_slot = 0
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embeds `text` and normalizes it to unit length so similarity is a dot product."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        """Sends queued texts to the embeddings API in batches until the queue is empty."""
+        while self._pending:
+            batch = self._pending[: self.MAX_BATCH_SIZE]
+            del self._pending[: self.MAX_BATCH_SIZE]
+
+            try:
+                vectors = await self.embeddings.aembed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            logger.info("SemanticQueryCache: embedded batch of %d", len(batch))
+            matrix = np.asarray(vectors, dtype=np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            for (_, future), vector in zip(batch, matrix):
+                if not future.done():
+                    future.set_result(vector)
+
+    def search(self, embedding: np.ndarray) -> Optional[str]:
+        """Returns the answer of the most similar live entry above the threshold, if any."""
+        if self._vectors is None:
+            return None
+
+        scores = self._vectors @ embedding
+        scores[self._expires_at < time.monotonic()] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        logger.info("SemanticQueryCache: hit (similarity=%.3f)", scores[best])
+        return self._answers[best]
+
+    def add(self, embedding: np.ndarray, answer: str) -> None:
+        """Stores an answer for the given query embedding, overwriting the oldest entry if full."""
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32)
+
+        slot = self._next_slot
+        self._vectors[slot] = embedding
+        self._expires_at[slot] = time.monotonic() + self.ttl_seconds
+        self._answers[slot] = answer
+        self._next_slot = (slot + 1) % self.max_entries
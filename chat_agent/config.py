@@ -0,0 +1,61 @@
+"""
+chat_agent/config.py
+
+Application settings for the Longevity Research Chat Agent.
+The environment (and .env file) is read once and frozen into a Settings object.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Immutable snapshot of the environment configuration.
+    """
+
+    openai_api_key: Optional[str]
+    openai_model: Optional[str]
+    openai_embedding_model: str
+    openai_structured_outputs: bool
+    openai_router_model: Optional[str]
+    router_confidence_threshold: float
+    chat_history_limit: int
+    chat_history_max_tokens: int
+    chat_history_dsn: Optional[str]
+    db_pool_min_size: int
+    db_pool_max_size: int
+    tool_timeout_seconds: float
+    shutdown_timeout_seconds: float
+    cache_ttl_seconds: int
+    cache_max_entries: int
+    semantic_cache_threshold: float
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Loads the .env file and builds the process-wide Settings on first use."""
+    load_dotenv()
+    return Settings(
+        openai_api_key=os.environ.get("OPENAI_API_KEY"),
+        openai_model=os.environ.get("OPENAI_MODEL"),
+        openai_embedding_model=os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
+        openai_structured_outputs=os.environ.get("OPENAI_STRUCTURED_OUTPUTS", "true").lower() in ("1", "true", "yes"),
+        openai_router_model=os.environ.get("OPENAI_ROUTER_MODEL"),
+        router_confidence_threshold=float(os.environ.get("ROUTER_CONFIDENCE_THRESHOLD", 0.85)),
+        chat_history_limit=int(os.environ.get("CHAT_HISTORY_LIMIT", 10)),
+        chat_history_max_tokens=int(os.environ.get("CHAT_HISTORY_MAX_TOKENS", 2000)),
+        chat_history_dsn=os.environ.get("CHAT_HISTORY_DSN"),
+        db_pool_min_size=int(os.environ.get("DB_POOL_MIN_SIZE", 4)),
+        db_pool_max_size=int(os.environ.get("DB_POOL_MAX_SIZE", 32)),
+        tool_timeout_seconds=float(os.environ.get("TOOL_TIMEOUT_SECONDS", 30)),
+        shutdown_timeout_seconds=float(os.environ.get("SHUTDOWN_TIMEOUT_SECONDS", 10)),
+        cache_ttl_seconds=int(os.environ.get("CACHE_TTL_SECONDS", 24 * 60 * 60)),
+        cache_max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", 4096)),
+        semantic_cache_threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", 0.95)),
+    )
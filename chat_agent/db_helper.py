@@ -5,23 +5,18 @@ Utility functions and data models for managing chat history persistence and retr
 This module abstracts database interactions (e.g., storage backend).
 """
 
-import os
 import uuid
+import asyncio
 import datetime
 from typing import Optional, Literal, Any
 
-from dotenv import load_dotenv
-from pydantic import BaseModel, Field
+import asyncpg
+from pydantic import BaseModel, ConfigDict, Field
 
 from chat_agent.logger import logger
 from chat_agent.models import Route
-
-# ============================================================
-# Environment setup
-# ============================================================
-
-load_dotenv()
-CHAT_HISTORY_LIMIT = int(os.getenv("CHAT_HISTORY_LIMIT", 10))
+from chat_agent.config import get_settings
+from chat_agent.utils import format_compact_line
 
 # ============================================================
 # Data Model
@@ -33,24 +28,115 @@ class ChatHistory(BaseModel):
     Represents a single message in the chat history stored in Cosmos DB (or any backend).
     """
 
+    model_config = ConfigDict(extra="ignore")
+
     id: str = Field(..., description="Unique message identifier")
     user_id: str = Field(..., description="User identifier")
     session_id: str = Field(..., description="Main session identifier for the conversation")
     role: Literal["user", "assistant"] = Field(..., description="Type of message: user or assistant")
     tool_used: Optional[Route] = Field(default=None, description="Tool used to generate this message (if applicable)")
     message: str = Field(..., description="The actual message content")
+    compact: Optional[str] = Field(default=None, description="Pre-formatted single-line form of the message for LLM history")
     created_at: str = Field(
-        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
         description="Timestamp when the message was created (ISO 8601 format)",
     )
 
 
+# ============================================================
+# Connection Pool
+# ============================================================
+
+# Expected schema (Postgres). created_at holds UTC ISO 8601 text, which sorts chronologically.
+# It has one-second resolution, so seq breaks ties between messages written in the same second
+# (a turn's user and assistant rows are written milliseconds apart, in that order).
+#
+#   CREATE TABLE chat_history (
+#       seq         BIGSERIAL,
+#       id          TEXT PRIMARY KEY,
+#       user_id     TEXT NOT NULL,
+#       session_id  TEXT NOT NULL,
+#       role        TEXT NOT NULL,
+#       tool_used   TEXT,
+#       message     TEXT NOT NULL,
+#       compact     TEXT,
+#       created_at  TEXT NOT NULL
+#   );
+#   CREATE INDEX chat_history_session_idx ON chat_history (user_id, session_id, created_at DESC, seq DESC);
+#
+# Tables created before seq existed need:
+#
+#   ALTER TABLE chat_history ADD COLUMN seq BIGSERIAL;
+#   DROP INDEX chat_history_session_idx;
+#   CREATE INDEX chat_history_session_idx ON chat_history (user_id, session_id, created_at DESC, seq DESC);
+#
+# compact is written once at insert time (see utils.format_compact_line). Backfill rows
+# written before the column existed with:
+#
+#   UPDATE chat_history
+#   SET compact = CASE
+#       WHEN tool_used IS NULL THEN role || ': ' || message
+#       ELSE role || ' (tool_used: ' || tool_used || '): ' || message
+#   END
+#   WHERE compact IS NULL;
+#
+# asyncpg prepares each statement once per connection and reuses it from its statement cache.
+
+INSERT_CHAT_MESSAGE = """
+INSERT INTO chat_history (id, user_id, session_id, role, tool_used, message, compact, created_at)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+"""
+
+FETCH_CHAT_MESSAGES = """
+SELECT id, user_id, session_id, role, tool_used, message, compact, created_at
+FROM chat_history
+WHERE user_id = $1 AND session_id = $2
+ORDER BY created_at DESC, seq DESC
+LIMIT $3
+"""
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_pool() -> Optional[asyncpg.Pool]:
+    """
+    Returns the shared connection pool, creating it on first use.
+    Returns None when no CHAT_HISTORY_DSN is configured.
+    """
+    global _pool
+
+    settings = get_settings()
+    if not settings.chat_history_dsn:
+        return None
+
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                logger.info("get_pool: creating chat history connection pool")
+                _pool = await asyncpg.create_pool(
+                    settings.chat_history_dsn,
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                )
+    return _pool
+
+
+async def close_pool() -> None:
+    """Closes the shared connection pool, if one was created."""
+    global _pool
+
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
 # ============================================================
 # Persistence Functions
 # ============================================================
 
 
-def persist_chat_history(
+async def persist_chat_history(
     user_id: str,
     data: str,
     role: Literal["user", "assistant"],
@@ -64,30 +150,34 @@ def persist_chat_history(
     try:
         logger.info("persist_chat_history: start")
 
-        current_time = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-        message_id = str(uuid.uuid4())
+        current_time = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        message_id = uuid.uuid4().hex
 
         # Create session ID if this is the start of a new conversation
         if not session_id:
             session_id = str(uuid.uuid4())
 
-        message = ChatHistory(
-            id=message_id,
-            user_id=user_id,
-            session_id=session_id,
-            role=role,
-            tool_used=tool_name if role == "assistant" else None,
-            message=data,
-            created_at=current_time,
-        )
+        # Inputs come from the graph and are already trusted, so bind them
+        # directly; validate with ChatHistory only at external boundaries.
+        tool_used = tool_name if role == "assistant" else None
+        compact = format_compact_line(role, data, tool_used)
+
+        pool = await get_pool()
+        if pool is None:
+            logger.info("persist_chat_history: no database configured — message not stored")
+            return session_id
 
-        # TODO: Insert message into actual database
-        logger.info(f"Chat history saved for session_id={session_id} role={role}")
+        async with pool.acquire() as con:
+            await con.execute(
+                INSERT_CHAT_MESSAGE,
+                message_id, user_id, session_id, role, tool_used, data, compact, current_time,
+            )
+        logger.info("Chat history saved for session_id=%s role=%s", session_id, role)
 
         return session_id
 
     except Exception as e:
-        logger.error(f"persist_chat_history: failed to insert chat history - {e}", exc_info=True)
+        logger.error("persist_chat_history: failed to insert chat history - %s", e, exc_info=True)
         raise
 
 
@@ -96,10 +186,10 @@ def persist_chat_history(
 # ============================================================
 
 
-def fetch_chat_history(
+async def fetch_chat_history(
     user_id: str,
     session_id: Optional[str] = None,
-    limit: int = CHAT_HISTORY_LIMIT,
+    limit: int = get_settings().chat_history_limit,
 ) -> dict[str, Any]:
     """
     Retrieve chat history for a given user and session.
@@ -111,16 +201,24 @@ def fetch_chat_history(
         limit: Maximum number of messages to retrieve
     """
     try:
-        logger.info(f"fetch_chat_history: start (user_id={user_id}, session_id={session_id})")
+        logger.info("fetch_chat_history: start (user_id=%s, session_id=%s)", user_id, session_id)
 
         if not session_id:
             logger.info("fetch_chat_history: no session_id provided — returning empty history")
             return {"status": "success", "chat_history": [], "count": 0}
 
-        # TODO: Replace this with a database query
-        chat_messages: list[dict[str, Any]] = []
+        pool = await get_pool()
+        if pool is None:
+            logger.info("fetch_chat_history: no database configured — returning empty history")
+            return {"status": "success", "chat_history": [], "count": 0}
+
+        # Single query for the newest `limit` messages, served by the session index
+        async with pool.acquire() as con:
+            rows = await con.fetch(FETCH_CHAT_MESSAGES, user_id, session_id, limit)
+
+        chat_messages = [ChatHistory.model_validate(dict(row)) for row in rows]
 
-        logger.info(f"fetch_chat_history: retrieved {len(chat_messages)} messages")
+        logger.info("fetch_chat_history: retrieved %d messages", len(chat_messages))
         return {
             "status": "success",
             "chat_history": chat_messages,
@@ -128,7 +226,7 @@ def fetch_chat_history(
         }
 
     except Exception as e:
-        logger.error(f"fetch_chat_history: error retrieving chat history - {e}", exc_info=True)
+        logger.error("fetch_chat_history: error retrieving chat history - %s", e, exc_info=True)
         return {
             "status": "error",
             "chat_history": [],
@@ -5,19 +5,25 @@ Defines the conversational graph workflow for the longevity chat agent using Lan
 This orchestrates the LLM routing, tool execution, persistence, and response streaming.
 """
 
-import json
+import asyncio
+import inspect
 import time
-from typing import Optional
+import uuid
+from functools import wraps
+from typing import Any, Callable, Optional
 
+import orjson
 from langgraph.graph import StateGraph, END
 from langgraph.config import get_stream_writer
 
 from chat_agent.logger import logger
+from chat_agent.config import get_settings
 from chat_agent.llm import llm_wrapper
+from chat_agent.cache import SemanticQueryCache
 from chat_agent.tools import longevity_clinical_trial_tool, aging_biomarker_tool
 from chat_agent.graph_state import ChatAgentState
-from chat_agent.models import RouterOutput
-from chat_agent.utils import create_compact_chat_history
+from chat_agent.models import Route, RouterOutput
+from chat_agent.utils import create_compact_chat_history, fast_route
 from chat_agent.db_helper import fetch_chat_history, persist_chat_history
 
 
@@ -26,258 +32,451 @@ from chat_agent.db_helper import fetch_chat_history, persist_chat_history
 # ============================================================
 
 llm = llm_wrapper()
+semantic_cache = SemanticQueryCache()
+
+TOOLS = {
+    "longevity_clinical_trial_tool": longevity_clinical_trial_tool,
+    "aging_biomarker_tool": aging_biomarker_tool,
+}
+
+# Fire-and-forget persistence tasks still in flight.
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def drain_background_tasks(timeout: float) -> None:
+    """Waits up to `timeout` seconds for in-flight persistence tasks, e.g. before shutdown."""
+    if not _background_tasks:
+        return
+
+    logger.info("drain_background_tasks: waiting for %d pending writes", len(_background_tasks))
+    _, pending = await asyncio.wait(set(_background_tasks), timeout=timeout)
+    if pending:
+        logger.error("drain_background_tasks: %d writes still pending after %.1fs", len(pending), timeout)
+
+
+# ============================================================
+# Tool Dispatch
+# ============================================================
+
+async def run_tool(name: str, user_input: str, user_id: str) -> dict[str, Any]:
+    """
+    Runs a tool with the configured timeout.
+
+    Timeouts and unexpected exceptions are mapped to the tools' own error shape,
+    `{"status": "error", "error": ...}`, so one failing tool can't break a fan-out.
+    """
+    try:
+        return await asyncio.wait_for(
+            TOOLS[name](user_input, user_id),
+            timeout=get_settings().tool_timeout_seconds,
+        )
+    except asyncio.TimeoutError:
+        logger.error("run_tool: %s timed out", name)
+        return {"status": "error", "error": f"{name} timed out"}
+    except Exception as e:
+        logger.error("run_tool: %s failed - %r", name, e)
+        return {"status": "error", "error": repr(e)}
+
+
+# ============================================================
+# Node Guard
+# ============================================================
+
+def graph_node(skip_on_error: bool = True):
+    """
+    Wraps a node with the shared error handling and timing.
+
+    Skips the node when an earlier node recorded an error (unless `skip_on_error`
+    is False), records any exception in `state["error"]` instead of raising, and
+    logs how long the node took at DEBUG. Works for both sync and async nodes.
+    """
+
+    def decorator(fn: Callable[[ChatAgentState], Any]):
+        name = fn.__name__
+
+        def _skip(state: ChatAgentState) -> bool:
+            if skip_on_error and state.get("error"):
+                logger.info("Node %s: skipped due to prior error", name)
+                return True
+            logger.info("Node %s: start", name)
+            return False
+
+        def _fail(state: ChatAgentState, e: Exception) -> ChatAgentState:
+            logger.error("Node %s: exception - %s", name, e)
+            state.setdefault("error", []).append(f"Node {name}: {e}")
+            return state
+
+        def _timed(started: float) -> None:
+            logger.debug("Node %s: done in %.1f ms", name, (time.perf_counter() - started) * 1000)
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(state: ChatAgentState) -> ChatAgentState:
+                if _skip(state):
+                    return state
+                started = time.perf_counter()
+                try:
+                    return await fn(state)
+                except Exception as e:
+                    return _fail(state, e)
+                finally:
+                    _timed(started)
+
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(state: ChatAgentState) -> ChatAgentState:
+            if _skip(state):
+                return state
+            started = time.perf_counter()
+            try:
+                return fn(state)
+            except Exception as e:
+                return _fail(state, e)
+            finally:
+                _timed(started)
+
+        return wrapper
+
+    return decorator
 
 
 # ============================================================
 # Node Definitions
 # ============================================================
 
-def classify_and_route(state: ChatAgentState) -> ChatAgentState:
+@graph_node()
+async def classify_and_route(state: ChatAgentState) -> ChatAgentState:
     """Classify user query and route to the appropriate node."""
-    if state.get("error"):
-        logger.info("Node classify_and_route: skipped due to prior error")
-        return state
-
     try:
-        logger.info("Node classify_and_route: start")
+        # Greetings and obvious guardrail violations skip the LLM router
+        fast_path = fast_route(state["user_input"])
+        if fast_path:
+            routing_output, canned_answer = fast_path
+            logger.info("Node classify_and_route: fast path - %s", routing_output.decision)
+            state["route"] = routing_output.decision
+            if canned_answer:
+                state["final_answer"] = canned_answer
+            return state
+
+        state = await resolve_chat_history(state)
+        if state.get("error"):
+            return state
+
         user_input = state["user_input"]
         chat_history = state["chat_history"]
 
-        routing_output: RouterOutput = llm.decide_route(user_input, chat_history)
+        routing_output: RouterOutput = await llm.decide_route(user_input, chat_history)
         if routing_output.error:
             state.setdefault("error", []).append(f"Node classify_and_route: {routing_output.error}")
             return state
 
         state["route"] = routing_output.decision
+        state["tools"] = list(dict.fromkeys(routing_output.tools or []))
         state["rejection_message"] = routing_output.rejection_message
         return state
+    finally:
+        # The fast path and early failures never await the history; stop the fetch
+        cancel_chat_history(state)
 
-    except Exception as e:
-        logger.error(f"Node classify_and_route: exception - {e}")
-        state.setdefault("error", []).append(f"Node classify_and_route: {e}")
-        return state
 
-
-def longevity_clinical_trial_node(state: ChatAgentState) -> ChatAgentState:
+@graph_node()
+async def longevity_clinical_trial_node(state: ChatAgentState) -> ChatAgentState:
     """Handles queries requiring the longevity clinical trial tool."""
-    if state.get("error"):
-        logger.info("Node longevity_clinical_trial_node: skipped due to prior error")
-        return state
-
-    try:
-        logger.info("Node longevity_clinical_trial_node: start")
-
-        writer = get_stream_writer()
-        writer({
-            "CurrentStep": "Researching information using longevity_clinical_trial_tool",
-            "Response": {}
-        })
+    writer = get_stream_writer()
+    writer({
+        "CurrentStep": "Researching information using longevity_clinical_trial_tool",
+        "Response": {}
+    })
+
+    user_id = state.get("user_id")
+    user_input = state.get("user_input")
+    logger.info("Node longevity_clinical_trial_node: user_id: %s", user_id)
+
+    res = await run_tool("longevity_clinical_trial_tool", user_input, user_id)
+    if res.get("status") == "error":
+        state.setdefault("error", []).append(f"Node longevity_clinical_trial_node: {res.get('error')}")
+    else:
+        state["final_answer"] = res.get("response")
 
-        user_id = state.get("user_id")
-        user_input = state.get("user_input")
-        logger.info(f"Node longevity_clinical_trial_node: user_id: {user_id}")
+    return state
 
-        res = longevity_clinical_trial_tool(user_input, user_id)
-        if res.get("status") == "error":
-            state.setdefault("error", []).append(f"Node longevity_clinical_trial_node: {res.get('error')}")
-        else:
-            state["final_answer"] = res.get("response")
 
-        return state
+@graph_node()
+async def aging_biomarker_node(state: ChatAgentState) -> ChatAgentState:
+    """Handles queries requiring the aging biomarker tool."""
+    user_id = state.get("user_id")
+    user_input = state.get("user_input")
+
+    writer = get_stream_writer()
+    writer({
+        "CurrentStep": "Researching information using aging_biomarker_tool",
+        "Response": {}
+    })
+
+    res = await run_tool("aging_biomarker_tool", user_input, user_id)
+    if res.get("status") == "error":
+        state.setdefault("error", []).append(f"Node aging_biomarker_node: {res.get('error')}")
+    else:
+        state["final_answer"] = res.get("response")
 
-    except Exception as e:
-        logger.error("Node longevity_clinical_trial_node: exception - %s", e)
-        state.setdefault("error", []).append(f"Node longevity_clinical_trial_node: {e}")
-        return state
+    return state
 
 
-def aging_biomarker_node(state: ChatAgentState) -> ChatAgentState:
-    """Handles queries requiring the aging biomarker tool."""
-    if state.get("error"):
-        logger.info("Node aging_biomarker_node: skipped due to prior error")
-        return state
+@graph_node()
+async def parallel_tools_node(state: ChatAgentState) -> ChatAgentState:
+    """Runs every tool selected by the router concurrently and synthesizes one answer."""
+    user_id = state.get("user_id")
+    user_input = state.get("user_input")
+    selected = state.get("tools", [])
 
-    try:
-        logger.info("Node aging_biomarker_node: start")
-        user_id = state.get("user_id")
-        user_input = state.get("user_input")
+    writer = get_stream_writer()
+    writer({
+        "CurrentStep": f"Researching information using {', '.join(selected)}",
+        "Response": {}
+    })
 
-        writer = get_stream_writer()
-        writer({
-            "CurrentStep": "Researching information using aging_biomarker_tool",
-            "Response": {}
-        })
+    # Wall time is the slowest tool rather than the sum of all of them.
+    results = await asyncio.gather(
+        *(run_tool(name, user_input, user_id) for name in selected)
+    )
 
-        res = aging_biomarker_tool(user_input, user_id)
+    tool_outputs = {}
+    for name, res in zip(selected, results):
         if res.get("status") == "error":
-            state.setdefault("error", []).append(f"Node aging_biomarker_node: {res.get('error')}")
+            state.setdefault("error", []).append(f"Node parallel_tools_node: {name}: {res.get('error')}")
         else:
-            state["final_answer"] = res.get("response")
+            tool_outputs[name] = res.get("response")
 
+    if state.get("error"):
         return state
 
-    except Exception as e:
-        logger.error(f"Node aging_biomarker_node: exception - {e}")
-        state.setdefault("error", []).append(f"Node aging_biomarker_node: {e}")
-        return state
+    state["final_answer"] = await llm.synthesize_answer(user_input, tool_outputs)
+    return state
 
 
-def general_knowledge_node(state: ChatAgentState) -> ChatAgentState:
+@graph_node()
+async def general_knowledge_node(state: ChatAgentState) -> ChatAgentState:
     """Handles general knowledge queries through the LLM."""
-    if state.get("error"):
-        logger.info("Node general_knowledge_node: skipped due to prior error")
+    # Already answered by the classifier fast path
+    if state.get("final_answer"):
         return state
 
+    emit_token = None
+    if state.get("enable_streaming"):
+        writer = get_stream_writer()
+
+        def _emit_token(token: str) -> None:
+            writer({
+                "CurrentStep": "Generating answer",
+                "Response": {"token": token},
+            })
+
+        emit_token = _emit_token
+
+    user_input = state["user_input"]
+
+    # General answers don't depend on chat history, so near-duplicate
+    # questions can reuse an earlier answer without calling the LLM.
+    embedding = None
     try:
-        logger.info("Node general_knowledge_node: start")
-        state["final_answer"] = llm.answer_general(state["user_input"])
-        return state
+        embedding = await semantic_cache.embed(user_input)
+        cached_answer = semantic_cache.search(embedding)
     except Exception as e:
-        logger.error(f"Node general_knowledge_node: exception - {e}")
-        state.setdefault("error", []).append(f"Node general_knowledge_node: {e}")
+        logger.error("Node general_knowledge_node: semantic cache lookup failed - %s", e)
+        cached_answer = None
+
+    if cached_answer is not None:
+        if emit_token:
+            emit_token(cached_answer)
+        state["final_answer"] = cached_answer
         return state
 
+    state["final_answer"] = await llm.answer_general(user_input, on_token=emit_token)
+    if embedding is not None and state["final_answer"]:
+        semantic_cache.add(embedding, state["final_answer"])
+    return state
 
+
+@graph_node()
 def rejection_handler(state: ChatAgentState) -> ChatAgentState:
     """Handles rejected or invalid queries."""
-    if state.get("error"):
-        logger.info("Node rejection_handler: skipped due to prior error")
+    if state.get("rejection_message"):
+        state["final_answer"] = state["rejection_message"]
+    else:
+        state["final_answer"] = (
+            "Sorry, I can't help with that request. "
+            "Ask me about biomarkers, clinical trials, or longevity research."
+        )
+    return state
+
+
+@graph_node()
+async def get_chat_history(state: ChatAgentState) -> ChatAgentState:
+    """Starts fetching the user session chat history without waiting for it.
+
+    The fetch runs as a background task; `classify_and_route` awaits it right
+    before the history is needed, so database latency overlaps with the rest
+    of the request setup.
+    """
+    user_id = state.get("user_id", "")
+    session_id = state.get("session_id", "")
+
+    if not user_id:
+        msg = "Node get_chat_history: user_id missing"
+        logger.error(msg)
+        state.setdefault("error", []).append(msg)
         return state
 
-    try:
-        logger.info("Node rejection_handler: start")
-        if state.get("rejection_message"):
-            state["final_answer"] = state["rejection_message"]
-        else:
-            state["final_answer"] = (
-                "Sorry, I can't help with that request. "
-                "Ask me about biomarkers, clinical trials, or longevity research."
-            )
-        return state
-    except Exception as e:
-        logger.error(f"Node rejection_handler: exception - {e}")
-        state.setdefault("error", []).append(f"Node rejection_handler: {e}")
-        return state
+    state["chat_history_task"] = asyncio.create_task(
+        fetch_chat_history(user_id=user_id, session_id=session_id)
+    )
+    return state
 
 
-def get_chat_history(state: ChatAgentState) -> ChatAgentState:
-    """Retrieves user session chat history and formats it compactly for the LLM."""
-    if state.get("error"):
-        logger.info("Node get_chat_history: skipped due to prior error")
-        return state
+def cancel_chat_history(state: ChatAgentState) -> None:
+    """Cancels the pending history fetch when the history won't be used."""
+    task = state.get("chat_history_task")
+    if task is not None and not task.done():
+        task.cancel()
 
-    try:
-        logger.info("Node get_chat_history: start")
-        user_id = state.get("user_id", "")
-        session_id = state.get("session_id", "")
-
-        if not user_id:
-            msg = "Node get_chat_history: user_id missing"
-            logger.error(msg)
-            state.setdefault("error", []).append(msg)
-            return state
-
-        result = fetch_chat_history(user_id=user_id, session_id=session_id)
-        if result.get("status") == "success":
-            chat_history_raw = result.get("chat_history", [])
-            if chat_history_raw:
-                chat_history_compact = create_compact_chat_history(chat_history_raw)
-                state["chat_history"] = chat_history_compact
-            else:
-                logger.info("Node get_chat_history: no chat history found")
-                state["chat_history"] = ""
-        else:
-            msg = result.get("message", "unknown error")
-            logger.error(f"Node get_chat_history: failed - {msg}")
-            state.setdefault("error", []).append(f"Node get_chat_history: {msg}")
 
+async def resolve_chat_history(state: ChatAgentState) -> ChatAgentState:
+    """Awaits the pending history fetch and formats it compactly for the LLM."""
+    task = state.get("chat_history_task")
+    if task is None:
+        state.setdefault("chat_history", "")
         return state
 
-    except Exception as e:
-        logger.error(f"Node get_chat_history: exception - {e}")
-        state.setdefault("error", []).append(f"Node get_chat_history: {e}")
-        return state
+    result = await task
+    if result.get("status") == "success":
+        chat_history_raw = result.get("chat_history", [])
+        if chat_history_raw:
+            state["chat_history"] = create_compact_chat_history(chat_history_raw)
+        else:
+            logger.info("Node get_chat_history: no chat history found")
+            state["chat_history"] = ""
+    else:
+        msg = result.get("message", "unknown error")
+        logger.error("Node get_chat_history: failed - %s", msg)
+        state.setdefault("error", []).append(f"Node get_chat_history: {msg}")
 
+    return state
 
-def save_chat_history(state: ChatAgentState) -> ChatAgentState:
-    """Persists both user and assistant messages."""
-    if state.get("error"):
-        logger.info("Node save_chat_history: skipped due to prior error")
-        return state
 
+async def persist_chat_turn(
+    user_id: str,
+    session_id: str,
+    user_msg: str,
+    assistant_msg: str,
+    route_used: Optional[Route],
+) -> None:
+    """Persists the user and assistant messages of a single chat turn."""
+    # Save user message
     try:
-        logger.info("Node save_chat_history: start")
-        user_id = state.get("user_id", "")
-        user_msg = state.get("user_input", "")
-        assistant_msg = state.get("final_answer", "")
-        route_used = state.get("route", None)
-        session_id = state.get("session_id", None)
-
-        if not user_id:
-            msg = "Node save_chat_history: user_id is missing"
-            logger.error(msg)
-            state.setdefault("error", []).append(msg)
-            return state
-
-        # Save user message
-        try:
-            if user_id and user_msg:
-                session_id = persist_chat_history(
-                    user_id=user_id,
-                    data=user_msg,
-                    role="user",
-                    session_id=session_id,
-                    tool_name=None,
-                )
-        except Exception as e:
-            logger.error(f"Node save_chat_history: failed to save user message - {e}")
-
-        # Save assistant message
-        try:
-            if user_id and assistant_msg:
-                session_id = persist_chat_history(
-                    user_id=user_id,
-                    data=assistant_msg,
-                    role="assistant",
-                    session_id=session_id,
-                    tool_name=route_used,
-                )
-        except Exception as e:
-            logger.error(f"Node save_chat_history: failed to save assistant message - {e}")
-
-        state["session_id"] = session_id
-        return state
+        if user_msg:
+            await persist_chat_history(
+                user_id=user_id,
+                data=user_msg,
+                role="user",
+                session_id=session_id,
+                tool_name=None,
+            )
+    except Exception as e:
+        logger.error("Node save_chat_history: failed to save user message - %s", e)
 
+    # Save assistant message
+    try:
+        if assistant_msg:
+            await persist_chat_history(
+                user_id=user_id,
+                data=assistant_msg,
+                role="assistant",
+                session_id=session_id,
+                tool_name=route_used,
+            )
     except Exception as e:
-        logger.error(f"Node save_chat_history: exception - {e}")
-        state.setdefault("error", []).append(f"Node save_chat_history: {e}")
+        logger.error("Node save_chat_history: failed to save assistant message - %s", e)
+
+
+@graph_node()
+async def save_chat_history(state: ChatAgentState) -> ChatAgentState:
+    """Schedules persistence of both user and assistant messages.
+
+    The writes run in the background so the answer is returned without
+    waiting on the database; the session ID is assigned up front.
+    """
+    user_id = state.get("user_id", "")
+    user_msg = state.get("user_input", "")
+    assistant_msg = state.get("final_answer", "")
+    route_used = state.get("route", None)
+    session_id = state.get("session_id", None)
+
+    if not user_id:
+        msg = "Node save_chat_history: user_id is missing"
+        logger.error(msg)
+        state.setdefault("error", []).append(msg)
         return state
 
+    # Create session ID if this is the start of a new conversation
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    task = asyncio.create_task(
+        persist_chat_turn(user_id, session_id, user_msg, assistant_msg, route_used)
+    )
+    # Keep a strong reference until the write completes.
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+    state["session_id"] = session_id
+    return state
 
+
+@graph_node(skip_on_error=False)
 def stream_final_response(state: ChatAgentState) -> ChatAgentState:
     """Streams the final answer to the client."""
-    try:
-        logger.info("Node stream_final_response: start")
-        writer = get_stream_writer()
-        writer({
-            "CurrentStep": "Done",
-            "Response": {
-                "answer": state.get("final_answer", ""),
-                "session_id": state.get("session_id", ""),
-                "error": state.get("error", []),
-            },
-        })
-        return state
-    except Exception as e:
-        logger.error(f"Node stream_final_response: exception - {e}")
-        state.setdefault("error", []).append(f"Node stream_final_response: {e}")
-        return state
+    writer = get_stream_writer()
+    writer({
+        "CurrentStep": "Done",
+        "Response": {
+            "answer": state.get("final_answer", ""),
+            "session_id": state.get("session_id", ""),
+            "error": state.get("error", []),
+        },
+    })
+    return state
 
 
 # ============================================================
 # Graph Assembly
 # ============================================================
 
+def finish(state: ChatAgentState) -> str:
+    """Where the run ends: the final stream event in streaming mode, otherwise END."""
+    return "stream_final_response" if state.get("enable_streaming") else END
+
+
+def continue_or_finish(next_node: str) -> Callable[[ChatAgentState], str]:
+    """Builds an edge that goes to `next_node`, or finishes early once an error is recorded."""
+
+    def route(state: ChatAgentState) -> str:
+        return finish(state) if state.get("error") else next_node
+
+    return route
+
+
+def select_route(state: ChatAgentState) -> str:
+    """Picks the branch after classification, fanning out when several tools were selected."""
+    if state.get("error"):
+        return finish(state)
+
+    route = state.get("route", "general_knowledge")
+    if route in TOOLS and len(state.get("tools") or []) > 1:
+        return "parallel_tools"
+    return route
+
+
 def build_graph():
     """Constructs and compiles the LangGraph workflow."""
     g = StateGraph(ChatAgentState)
@@ -286,6 +485,7 @@ def build_graph():
     g.add_node("classify_and_route", classify_and_route)
     g.add_node("longevity_clinical_trial_node", longevity_clinical_trial_node)
     g.add_node("aging_biomarker_node", aging_biomarker_node)
+    g.add_node("parallel_tools_node", parallel_tools_node)
     g.add_node("general_knowledge_node", general_knowledge_node)
     g.add_node("rejection_handler", rejection_handler)
     g.add_node("save_chat_history", save_chat_history)
@@ -294,38 +494,55 @@ def build_graph():
     # Entry point
     g.set_entry_point("get_chat_history")
 
+    # Early exits when a node records an error
+    finish_targets = {"stream_final_response": "stream_final_response", END: END}
+
     # Edges
-    g.add_edge("get_chat_history", "classify_and_route")
+    g.add_conditional_edges(
+        "get_chat_history",
+        continue_or_finish("classify_and_route"),
+        {"classify_and_route": "classify_and_route", **finish_targets},
+    )
     g.add_conditional_edges(
         "classify_and_route",
-        lambda s: s.get("route", "general_knowledge"),
+        select_route,
         {
             "longevity_clinical_trial_tool": "longevity_clinical_trial_node",
             "aging_biomarker_tool": "aging_biomarker_node",
+            "parallel_tools": "parallel_tools_node",
             "general_knowledge": "general_knowledge_node",
             "rejection_handler": "rejection_handler",
+            **finish_targets,
         },
     )
-    g.add_edge("general_knowledge_node", "save_chat_history")
-    g.add_edge("longevity_clinical_trial_node", "save_chat_history")
-    g.add_edge("aging_biomarker_node", "save_chat_history")
-    g.add_edge("rejection_handler", "save_chat_history")
+    for node in (
+        "general_knowledge_node",
+        "longevity_clinical_trial_node",
+        "aging_biomarker_node",
+        "parallel_tools_node",
+        "rejection_handler",
+    ):
+        g.add_conditional_edges(
+            node,
+            continue_or_finish("save_chat_history"),
+            {"save_chat_history": "save_chat_history", **finish_targets},
+        )
 
     # Streaming conditional edge
-    g.add_conditional_edges(
-        "save_chat_history",
-        lambda s: s.get("enable_streaming", False),
-        {True: "stream_final_response", False: END},
-    )
+    g.add_conditional_edges("save_chat_history", finish, finish_targets)
 
     return g.compile()
 
 
+# The graph topology is static, so compile it once per process and reuse it.
+GRAPH = build_graph()
+
+
 # ============================================================
 # Entrypoint
 # ============================================================
 
-def run_chat_agent(
+async def run_chat_agent(
     user_input: str,
     user_id: str,
     session_id: Optional[str] = None,
@@ -339,22 +556,22 @@ def run_chat_agent(
         "enable_streaming": enable_streaming,
     }
 
-    graph = build_graph()
+    graph = GRAPH
 
     # Streaming mode
     if enable_streaming:
         logger.info("Node run_chat_agent: streaming mode")
 
-        def _event_stream():
-            for chunk in graph.stream(state, stream_mode="custom"):
-                yield f"data: {json.dumps(chunk)}\n\n"
+        async def _event_stream():
+            async for chunk in graph.astream(state, stream_mode="custom"):
+                yield b"data: " + orjson.dumps(chunk) + b"\n\n"
 
         return _event_stream()
 
     # Non-streaming mode
     else:
         logger.info("Node run_chat_agent: normal mode")
-        out = graph.invoke(state)
+        out = await graph.ainvoke(state)
         return {
             "answer": out.get("final_answer", ""),
             "session_id": out.get("session_id", ""),
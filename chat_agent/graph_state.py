@@ -1,5 +1,6 @@
+import asyncio
 from typing import TypedDict, Any, Optional
-from chat_agent.models import Route
+from chat_agent.models import Route, ToolRoute
 
 class ChatAgentState(TypedDict, total=False):
     # input
@@ -9,8 +10,10 @@ class ChatAgentState(TypedDict, total=False):
     
     # output
     route: Optional[Route]
+    tools: Optional[list[ToolRoute]]
     rejection_message: Optional[str]
     final_answer: Optional[str]
     error: Optional[list[str]]
     chat_history: Optional[dict[str, Any]]
+    chat_history_task: Optional[asyncio.Task]
     enable_streaming: Optional[bool]
@@ -5,20 +5,32 @@ Wrapper around Azure OpenAI chat models for LLM interactions.
 Provides routing decisions and general question answering.
 """
 
-import os
-from dotenv import load_dotenv
+import asyncio
+from functools import lru_cache
+from typing import Any, Callable, Optional
 from langchain_openai import ChatOpenAI
-
-from chat_agent.prompts import ROUTING_PROMPT, ROUTING_SYSTEM_PROMPT, GENERAL_KNOWLEDGE_SYSTEM_PROMPT
-from chat_agent.utils import parse_routing_decision
+from openai import BadRequestError
+
+from chat_agent.prompts import (
+    ROUTING_SYSTEM_PROMPT,
+    build_routing_prompt,
+    GENERAL_KNOWLEDGE_SYSTEM_PROMPT,
+    TOOL_SYNTHESIS_SYSTEM_PROMPT,
+)
+from chat_agent.utils import parse_routing_decision, decision_confidence
 from chat_agent.logger import logger
-from chat_agent.models import RouterOutput
+from chat_agent.models import RouterOutput, ROUTER_OUTPUT_RESPONSE_FORMAT
+from chat_agent.cache import LLMResponseCache
+from chat_agent.config import get_settings
 
-# ============================================================
-# Environment setup
-# ============================================================
+# Routing decisions keyed by the exact routing prompt (question + chat history)
+routing_cache = LLMResponseCache()
 
-load_dotenv()
+# Router calls currently running, by the same key as routing_cache
+routing_in_flight: dict[bytes, asyncio.Task] = {}
+
+# Models (or deployments) that rejected the json_schema response_format in this process
+structured_outputs_unsupported: set[str] = set()
 
 # ============================================================
 # LLM Base Class
@@ -31,11 +43,65 @@ class LLMSingletonBase(ChatOpenAI):
 
     def __init__(self, **kwargs):
         default_kwargs = {
-            "api_key": os.getenv("OPENAI_API_KEY"),
+            "api_key": get_settings().openai_api_key,
         }
         super().__init__(**(default_kwargs | kwargs))
 
 
+# ============================================================
+# Routing Helpers
+# ============================================================
+
+@lru_cache(maxsize=1)
+def get_small_router() -> Optional[LLMSingletonBase]:
+    """
+    Returns the cheap first-pass routing model, or None when OPENAI_ROUTER_MODEL is unset.
+    It requests token logprobs so the routing decision's confidence can be measured.
+    """
+    model = get_settings().openai_router_model
+    if not model:
+        return None
+    return LLMSingletonBase(model=model, temperature=0, logprobs=True)
+
+
+def rejects_response_format(e: BadRequestError) -> bool:
+    """True when a 400 is about the response_format / json_schema rather than the request itself."""
+    if e.param == "response_format" or e.code == "invalid_json_schema":
+        return True
+    detail = f"{e.body} {e.message}"
+    return "response_format" in detail or "json_schema" in detail
+
+
+async def invoke_router(model: ChatOpenAI, messages: list) -> tuple[RouterOutput, Any]:
+    """
+    Run the routing prompt on `model` and parse its reply.
+
+    Returns:
+        tuple: Parsed routing decision and the raw model response
+    """
+    # Constrain the reply to the RouterOutput schema when the provider supports it
+    if get_settings().openai_structured_outputs and model.model_name not in structured_outputs_unsupported:
+        try:
+            resp = await model.ainvoke(messages, response_format=ROUTER_OUTPUT_RESPONSE_FORMAT)
+        except BadRequestError as e:
+            # Context length, content filter, etc. aren't fixed by dropping the schema
+            if not rejects_response_format(e):
+                raise
+            logger.warning("LLM: %s rejected structured outputs, retrying without - %s", model.model_name, e)
+            resp = await model.ainvoke(messages)
+            # The plain request went through, so the schema was the problem; stop sending it
+            structured_outputs_unsupported.add(model.model_name)
+    else:
+        resp = await model.ainvoke(messages)
+
+    content = (getattr(resp, "content", str(resp)) or "").strip()
+    logger.info("LLM: Deciding route (%s): %s", model.model_name, content)
+
+    # Schema-constrained replies decode on the fast path; the fence stripping and
+    # JSON repair fallbacks only matter for providers without structured outputs
+    return parse_routing_decision(content), resp
+
+
 # ============================================================
 # LLM Wrapper with Application Logic
 # ============================================================
@@ -48,7 +114,7 @@ class llm_wrapper(LLMSingletonBase):
 
     def __init__(self, **kwargs):
         default_kwargs = {
-            "model": os.getenv("OPENAI_MODEL"),
+            "model": get_settings().openai_model,
             "temperature": 0,
         }
         super().__init__(**(default_kwargs | kwargs))
@@ -56,7 +122,7 @@ class llm_wrapper(LLMSingletonBase):
     # -----------------------------
     # Routing Decisions
     # -----------------------------
-    def decide_route(self, user_input: str, chat_history: str = "") -> RouterOutput:
+    async def decide_route(self, user_input: str, chat_history: str = "") -> RouterOutput:
         """
         Decide which tool or path the conversation should follow based on the user's input.
 
@@ -68,36 +134,69 @@ class llm_wrapper(LLMSingletonBase):
             str: Parsed routing decision
         """
         logger.info("LLM: Deciding route: start")
-        
-        # Prepare structured routing prompt
-        routing_prompt_text = ROUTING_PROMPT.format(
-            user_question=user_input,
-            chat_history=chat_history,
-        )
 
+        # The routing template is fixed, so the inputs alone identify the prompt
+        cache_key = LLMResponseCache.make_key(user_input, chat_history)
+        cached = routing_cache.get(cache_key)
+        if cached is not None:
+            logger.info("LLM: Deciding route: cache hit (%s)", cached.decision)
+            return cached
+
+        # Single-flight: identical concurrent requests share one router call
+        task = routing_in_flight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._route_uncached(user_input, chat_history, cache_key))
+            routing_in_flight[cache_key] = task
+            task.add_done_callback(lambda _: routing_in_flight.pop(cache_key, None))
+        else:
+            logger.info("LLM: Deciding route: joining in-flight request")
+
+        # Shielded so one caller disconnecting doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _route_uncached(self, user_input: str, chat_history: str, cache_key: bytes) -> RouterOutput:
+        """Runs the routing models for a cache miss and memoizes successful decisions."""
         messages = [
             {"role": "system", "content": ROUTING_SYSTEM_PROMPT},
-            {"role": "user", "content": routing_prompt_text},
+            {"role": "user", "content": build_routing_prompt(user_input, chat_history)},
         ]
 
-        resp = self.invoke(messages)
-
-        content = (getattr(resp, "content", str(resp)) or "").strip()
-        logger.info(f"LLM: Deciding route: {content}")
-
-        # Parse decision using shared utility (already hardened)
-        parsed = parse_routing_decision(content)
+        # Try the cheap router first and escalate to this model only on low confidence
+        parsed = None
+        small_router = get_small_router()
+        if small_router is not None:
+            try:
+                candidate, resp = await invoke_router(small_router, messages)
+                confidence = decision_confidence((resp.response_metadata.get("logprobs") or {}).get("content"))
+                if not candidate.error and confidence >= get_settings().router_confidence_threshold:
+                    parsed = candidate
+                else:
+                    logger.info("LLM: Deciding route: escalating (confidence=%.2f)", confidence)
+            except Exception as e:
+                logger.error("LLM: Deciding route: small router failed - %s", e)
+
+        if parsed is None:
+            parsed, _ = await invoke_router(self, messages)
+
+        # Don't memoize failed parses; they are usually transient
+        if not parsed.error:
+            routing_cache.set(cache_key, parsed)
         return parsed
 
     # -----------------------------
     # General Knowledge Answering
     # -----------------------------
-    def answer_general(self, user_input: str) -> str:
+    async def answer_general(
+        self,
+        user_input: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
         """
         Provide a general answer to a user's question without invoking any specialized tools.
 
         Args:
             user_input: The question or request from the user
+            on_token: Optional callback invoked with each content chunk as it is generated
 
         Returns:
             str: LLM-generated response
@@ -109,5 +208,40 @@ class llm_wrapper(LLMSingletonBase):
             {"role": "user", "content": user_input},
         ]
 
-        resp = self.invoke(messages)
+        if on_token is None:
+            resp = await self.ainvoke(messages)
+            return (getattr(resp, "content", str(resp)) or "").strip()
+
+        # Forward tokens as they arrive so the client sees the first token early
+        parts: list[str] = []
+        async for chunk in self.astream(messages):
+            token = getattr(chunk, "content", "") or ""
+            if token:
+                parts.append(token)
+                on_token(token)
+        return "".join(parts).strip()
+
+    # -----------------------------
+    # Multi-tool Answer Synthesis
+    # -----------------------------
+    async def synthesize_answer(self, user_input: str, tool_outputs: dict[str, str]) -> str:
+        """
+        Combine the outputs of several tools into a single answer for the user.
+
+        Args:
+            user_input: The question or request from the user
+            tool_outputs: Mapping of tool name to that tool's response
+
+        Returns:
+            str: LLM-generated response
+        """
+        logger.info("LLM: Synthesizing answer: start")
+
+        tool_context = "\n\n".join(f"### {name}\n{output}" for name, output in tool_outputs.items())
+        messages = [
+            {"role": "system", "content": TOOL_SYNTHESIS_SYSTEM_PROMPT},
+            {"role": "user", "content": f"USER QUESTION:\n{user_input}\n\nTOOL OUTPUTS:\n{tool_context}"},
+        ]
+
+        resp = await self.ainvoke(messages)
         return (getattr(resp, "content", str(resp)) or "").strip()
@@ -1,15 +1,43 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional, List
+from typing import Literal, Optional, List, get_args
 
 Route = Literal["aging_biomarker_tool", "longevity_clinical_trial_tool", "general_knowledge", "rejection_handler"]
+ToolRoute = Literal["aging_biomarker_tool", "longevity_clinical_trial_tool"]
 
+# The router schema is defined three times and they must change together:
+# RouterOutput, ROUTER_OUTPUT_RESPONSE_FORMAT below, and utils._RouterPayload (wire decoder).
 class RouterOutput(BaseModel):
     """Simplified structured output from the routing node."""
     decision: Route = Field(..., description="The routing decision for the user's query")
+    tools: Optional[List[ToolRoute]] = Field(None, description="All tools to run concurrently when the query needs more than one")
     reasoning: str = Field(..., description="Brief explanation of why this route was chosen")
     rejection_message: Optional[str] = Field(None, description="User friendly message to be displayed if the question violates guardrails")
     error: Optional[str] = Field(None, description="Error message if the routing decision failed")
 
+# Strict JSON schema for the router's reply, used for provider-side structured outputs.
+# Strict mode requires every property to be listed in "required"; optional ones are nullable.
+ROUTER_OUTPUT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "RouterOutput",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "decision": {"type": "string", "enum": list(get_args(Route))},
+                "reasoning": {"type": "string"},
+                "rejection_message": {"type": ["string", "null"]},
+                "tools": {
+                    "type": ["array", "null"],
+                    "items": {"type": "string", "enum": list(get_args(ToolRoute))},
+                },
+            },
+            "required": ["decision", "reasoning", "rejection_message", "tools"],
+            "additionalProperties": False,
+        },
+    },
+}
+
 class ChatAIRequest(BaseModel):
     user_query: str
     user_id: str
@@ -34,6 +34,34 @@ You are part of a larger chat system that also has access to tools for longevity
 
 ROUTING_SYSTEM_PROMPT = """You are a routing system for a longevity research chat agent."""
 
+TOOL_SYNTHESIS_SYSTEM_PROMPT = """
+You are an expert medical researcher assistant in the field of Longevity.
+You are given the user's question and the outputs of several research tools that were run for it.
+Combine the tool outputs into a single, concise, evidence-based answer in markdown format.
+Only use information present in the tool outputs and do not provide personalized medical advice.
+"""
+
+# ============================================================
+# Fast-path Responses
+# ============================================================
+
+# Canned answers for trivial inputs that don't need the LLM router
+_GREETING_RESPONSE = (
+    "Hi! I can help with aging biomarkers, longevity clinical trials, "
+    "and general questions about longevity research. What would you like to know?"
+)
+_THANKS_RESPONSE = (
+    "You're welcome! Let me know if you have more questions about biomarkers, "
+    "clinical trials, or longevity research."
+)
+FAST_PATH_RESPONSES = {
+    "hi": _GREETING_RESPONSE,
+    "hello": _GREETING_RESPONSE,
+    "hey": _GREETING_RESPONSE,
+    "thanks": _THANKS_RESPONSE,
+    "thank you": _THANKS_RESPONSE,
+}
+
 # ============================================================
 # Routing Prompt Template
 # ============================================================
@@ -58,6 +86,7 @@ AVAILABLE ROUTES:
 
 ## ROUTING LOGIC:
 - Analyze the chat history (if provided) and the user's question to determine the best route.
+- If the question needs data from BOTH tools, set "decision" to the most relevant tool and list both tools in "tools".
 - Chat history provides context about previous questions, answers, and tools used.
 - Chat history is crucial for determining the best route and is ordered from newest to oldest.
 
@@ -72,7 +101,8 @@ You MUST respond with valid JSON in this exact schema:
 {{
     "decision": "string (one of: aging_biomarker_tool, longevity_clinical_trial_tool, general_knowledge, rejection_handler)",
     "reasoning": "string (brief explanation of routing decision)",
-    "rejection_message": "user friendly message to be displayed if the question violates guardrails"
+    "rejection_message": "user friendly message to be displayed if the question violates guardrails",
+    "tools": ["optional list of tools (aging_biomarker_tool, longevity_clinical_trial_tool), only when more than one is needed"]
 }}
 
 ## EXAMPLES
@@ -101,6 +131,13 @@ USER: "Find me clinical trials for NAD+ boosters in aging research"
     "reasoning": "Specific request for clinical trials related to NAD+ and aging"
 }}
 
+USER: "Which aging biomarkers are used as endpoints in ongoing senolytic trials?"
+{{
+    "decision": "longevity_clinical_trial_tool",
+    "reasoning": "Needs both clinical trial data and aging biomarker research",
+    "tools": ["longevity_clinical_trial_tool", "aging_biomarker_tool"]
+}}
+
 Now analyze this question and respond with ONLY the JSON object, no additional text:
 
 USER QUESTION: 
@@ -109,3 +146,17 @@ USER QUESTION:
 Chat history: 
 {chat_history}
 """
+
+# Split once at import around the two slots, so building a prompt is plain concatenation.
+# The constant pieces are unescaped here since they never go through str.format.
+_ROUTING_HEAD, _rest = ROUTING_PROMPT.split("{user_question}")
+_ROUTING_MIDDLE, _ROUTING_TAIL = _rest.split("{chat_history}")
+_ROUTING_HEAD, _ROUTING_MIDDLE, _ROUTING_TAIL = (
+    part.replace("{{", "{").replace("}}", "}") for part in (_ROUTING_HEAD, _ROUTING_MIDDLE, _ROUTING_TAIL)
+)
+del _rest
+
+
+def build_routing_prompt(user_question: str, chat_history: str) -> str:
+    """Fills the routing prompt; the fixed prefix before the question stays cacheable by the provider."""
+    return _ROUTING_HEAD + user_question + _ROUTING_MIDDLE + chat_history + _ROUTING_TAIL
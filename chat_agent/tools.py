@@ -8,11 +8,11 @@ Includes:
 """
 
 from typing import Any, Dict
-import time
+import asyncio
 from chat_agent.logger import logger
 
 
-def longevity_clinical_trial_tool(user_input: str, user_id: str) -> Dict[str, Any]:
+async def longevity_clinical_trial_tool(user_input: str, user_id: str) -> Dict[str, Any]:
     """
     Stub function for retrieving information from Longevity Clinical Trial Tracker.
 
@@ -24,18 +24,18 @@ def longevity_clinical_trial_tool(user_input: str, user_id: str) -> Dict[str, An
         dict: Response dictionary containing status and response data.
     """
     try:
-        logger.info("longevity_clinical_trial_tool: start")
-        time.sleep(5)  # Simulate processing delay
+        logger.debug("longevity_clinical_trial_tool: start")
+        await asyncio.sleep(5)  # Simulate processing delay
         return {
             "status": "ok",
             "response": "Detailed response from longevity_clinical_trial_tool"
         }
     except Exception as e:
-        logger.error(f"longevity_clinical_trial_tool: exception - {e}")
+        logger.error("longevity_clinical_trial_tool: exception - %s", e)
         return {"status": "error", "error": str(e)}
 
 
-def aging_biomarker_tool(user_input: str, user_id: str) -> Dict[str, Any]:
+async def aging_biomarker_tool(user_input: str, user_id: str) -> Dict[str, Any]:
     """
     Stub function for retrieving information from the Aging Biomarker Database.
 
@@ -47,12 +47,12 @@ def aging_biomarker_tool(user_input: str, user_id: str) -> Dict[str, Any]:
         dict: Response dictionary containing status and response data.
     """
     try:
-        logger.info("aging_biomarker_tool: start")
-        time.sleep(5)  # Simulate processing delay
+        logger.debug("aging_biomarker_tool: start")
+        await asyncio.sleep(5)  # Simulate processing delay
         return {
             "status": "ok",
             "response": "Detailed response from aging_biomarker_tool"
         }
     except Exception as e:
-        logger.error(f"aging_biomarker_tool: exception - {e}")
+        logger.error("aging_biomarker_tool: exception - %s", e)
         return {"status": "error", "error": str(e)}
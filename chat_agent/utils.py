@@ -3,15 +3,115 @@ chat_agent/utils.py
 
 Utility functions for the Longevity Research Chat Agent.
 Includes:
+- fast_route
+- build_router_output
 - parse_routing_decision
+- decision_confidence
+- load_encoding
+- count_tokens
+- format_compact_line
 - create_compact_chat_history
 """
 
-import json
 import re
-from typing import List, Any
+import math
+from functools import lru_cache
+from typing import List, Any, Optional, get_args
+
+import msgspec
+import orjson
+import tiktoken
+from json_repair import loads as repair_loads
+
+from chat_agent.config import get_settings
 from chat_agent.logger import logger
-from chat_agent.models import RouterOutput, ChatHistory
+from chat_agent.models import Route, ToolRoute, RouterOutput, ChatHistory
+from chat_agent.prompts import FAST_PATH_RESPONSES
+
+_ROUTES = frozenset(get_args(Route))
+_TOOL_ROUTES = frozenset(get_args(ToolRoute))
+
+
+class _RouterPayload(msgspec.Struct, forbid_unknown_fields=True):
+    """
+    Wire format of the router's JSON reply, decoded and type-checked in one pass.
+    Any other key (including "error") fails the decode and takes the build_router_output path.
+    """
+    decision: Route
+    reasoning: str
+    rejection_message: Optional[str] = None
+    tools: Optional[List[ToolRoute]] = None
+
+
+_ROUTER_DECODER = msgspec.json.Decoder(_RouterPayload)
+
+# Markdown code fence the LLM may wrap its JSON in; group 1 is the fenced body
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+# Obvious prompt-injection attempts; anything subtler is left to the LLM router.
+# "you are now" only counts as an opening instruction, since it also shows up in real questions.
+_MANIPULATION_RE = re.compile(
+    r"\bignore (?:all |any )?(?:the )?(?:previous|prior|above) instructions\b|^you are now\b"
+)
+
+
+def fast_route(user_input: str) -> Optional[tuple[RouterOutput, Optional[str]]]:
+    """
+    Route trivially classifiable inputs without calling the LLM router.
+
+    Args:
+        user_input (str): The user's query.
+
+    Returns:
+        tuple | None: The routing decision and an optional canned answer, or None
+        when the input needs the LLM router.
+    """
+    normalized = user_input.strip().lower().rstrip("!.? ")
+
+    canned_answer = FAST_PATH_RESPONSES.get(normalized)
+    if canned_answer:
+        return RouterOutput.model_construct(decision="general_knowledge", reasoning="fast path: greeting"), canned_answer
+
+    if _MANIPULATION_RE.search(normalized):
+        return RouterOutput.model_construct(decision="rejection_handler", reasoning="fast path: instruction manipulation"), None
+
+    return None
+
+
+def build_router_output(data: Any) -> RouterOutput:
+    """
+    Build a RouterOutput from parsed JSON, skipping Pydantic validation when the
+    data already has the exact expected shape.
+
+    Args:
+        data (Any): Parsed routing JSON.
+
+    Returns:
+        RouterOutput: The routing decision.
+    """
+    if isinstance(data, dict):
+        decision = data.get("decision")
+        reasoning = data.get("reasoning")
+        rejection_message = data.get("rejection_message")
+        tools = data.get("tools")
+
+        if (
+            decision in _ROUTES
+            and isinstance(reasoning, str)
+            and (rejection_message is None or isinstance(rejection_message, str))
+            and (tools is None or (isinstance(tools, list) and all(t in _TOOL_ROUTES for t in tools)))
+            and data.get("error") is None
+        ):
+            return RouterOutput.model_construct(
+                decision=decision,
+                reasoning=reasoning,
+                rejection_message=rejection_message,
+                tools=tools,
+                error=None,
+            )
+
+    # Anything unusual goes through full validation (coercion and error reporting)
+    return RouterOutput.model_validate(data)
 
 
 def parse_routing_decision(llm_response: str) -> RouterOutput:
@@ -27,28 +127,35 @@ def parse_routing_decision(llm_response: str) -> RouterOutput:
     try:
         response_text = llm_response.strip()
 
-        # Handle case where LLM might wrap JSON in markdown
-        if response_text.startswith("```json"):
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif response_text.startswith("```"):
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-
-        # Parse JSON
+        # Fast path: well-formed JSON decoded straight into the expected types
         try:
-            data = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Attempt to sanitize trailing commas
-            sanitized = re.sub(r',\s*(?=[}\]])', '', response_text)
-            data = json.loads(sanitized)
-
-        # Validate using Pydantic
-        routing_output = RouterOutput(**data)
-        logger.info(f"Routing decision: {routing_output.decision}")
-        logger.info(f"Routing reasoning: {routing_output.reasoning}")
+            payload = _ROUTER_DECODER.decode(response_text)
+            routing_output = RouterOutput.model_construct(
+                decision=payload.decision,
+                reasoning=payload.reasoning,
+                rejection_message=payload.rejection_message,
+                tools=payload.tools,
+                error=None,
+            )
+        except msgspec.DecodeError:
+            # Handle case where LLM might wrap JSON in markdown
+            fenced = _FENCE_RE.match(response_text)
+            if fenced:
+                response_text = fenced.group(1)
+
+            try:
+                data = orjson.loads(response_text)
+            except orjson.JSONDecodeError:
+                # Repair malformed JSON (trailing commas, single quotes, unquoted keys, truncation)
+                data = repair_loads(response_text)
+
+            routing_output = build_router_output(data)
+
+        logger.info("Routing decision=%s reasoning=%s", routing_output.decision, routing_output.reasoning)
         return routing_output
 
     except Exception as e:
-        logger.error(f"parse_routing_decision Error: {str(e)}")
+        logger.error("parse_routing_decision Error: %s", e)
         return RouterOutput(
             decision="rejection_handler",
             reasoning="error parsing routing decision",
@@ -56,27 +163,127 @@ def parse_routing_decision(llm_response: str) -> RouterOutput:
         )
 
 
-def create_compact_chat_history(db_chat_history: List[ChatHistory]) -> str:
+_DECISION_VALUE_RE = re.compile(r'"decision"\s*:\s*"')
+
+
+def decision_confidence(logprobs: Optional[List[dict[str, Any]]]) -> float:
+    """
+    Estimate how confident the model was in its routing decision.
+
+    Args:
+        logprobs (list | None): Per-token logprobs of the reply, as returned by the
+            OpenAI API (`[{"token": ..., "logprob": ...}, ...]`).
+
+    Returns:
+        float: Probability of the token that starts the "decision" value, or 0.0
+        if it can't be located.
+    """
+    if not logprobs:
+        return 0.0
+
+    text = "".join(item["token"] for item in logprobs)
+    match = _DECISION_VALUE_RE.search(text)
+    if not match:
+        return 0.0
+
+    # The route labels differ in their first token, so it carries the decision
+    offset = 0
+    for item in logprobs:
+        offset += len(item["token"])
+        if offset > match.end():
+            return math.exp(item["logprob"])
+    return 0.0
+
+
+# Set by load_encoding; None until then (or if loading failed)
+_encoding: Optional[tiktoken.Encoding] = None
+
+
+def load_encoding() -> None:
+    """
+    Loads the tokenizer for the configured model, falling back to o200k_base.
+
+    tiktoken downloads the BPE file with a blocking HTTP request on first use, so
+    call this once at startup off the event loop. If it fails, token counts fall
+    back to an approximation instead of failing requests.
+    """
+    global _encoding
+
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(get_settings().openai_model or "")
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.error("load_encoding: tokenizer unavailable, approximating token counts - %s", e)
+        return
+
+    _encoding = encoding
+    # Drop any approximate counts cached before the tokenizer was available
+    count_tokens.cache_clear()
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a string. Results are cached so messages that stay in the
+    history across turns are only tokenized once.
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        int: Number of tokens, or roughly len(text) / 4 if no tokenizer is loaded.
+    """
+    if _encoding is None:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text))
+
+
+def format_compact_line(role: str, message: str, tool_used: Optional[str] = None) -> str:
+    """
+    Formats one chat message as a single history line for the LLM.
+
+    Args:
+        role (str): "user" or "assistant".
+        message (str): The message content.
+        tool_used (str | None): Tool that produced the message, if any.
+
+    Returns:
+        str: The compact history line.
+    """
+    return f"{role} (tool_used: {tool_used}): {message}" if tool_used else f"{role}: {message}"
+
+
+def create_compact_chat_history(db_chat_history: List[ChatHistory], max_tokens: Optional[int] = None) -> str:
     """
     Converts a list of ChatHistory objects into a compact string suitable for LLM input.
+    Keeps the newest messages until the token budget is reached.
 
     Args:
-        db_chat_history (List[ChatHistory]): List of chat history objects from the database.
+        db_chat_history (List[ChatHistory]): Chat history objects from the database, newest first.
+        max_tokens (int | None): Token budget for the result; defaults to CHAT_HISTORY_MAX_TOKENS.
 
     Returns:
         str: Compact string representation of chat history with role/content pairs.
     """
-    lines: List[str] = []
+    if max_tokens is None:
+        max_tokens = get_settings().chat_history_max_tokens
 
-    for entry in db_chat_history:
-        role = entry.role
-        message = entry.message
+    # Rows carry their compact line from write time; format only legacy rows without one
+    lines = (
+        entry.compact or format_compact_line(entry.role, entry.message, entry.tool_used)
+        for entry in db_chat_history
+        if entry.role in ("user", "assistant") and entry.message
+    )
 
-        if role in ("user", "assistant") and message:
-            tool_used = entry.tool_used
-            if tool_used:
-                lines.append(f"{role} (tool_used: {tool_used}): {message}")
-            else:
-                lines.append(f"{role}: {message}")
+    kept: List[str] = []
+    total = 0
+    for line in lines:
+        total += count_tokens(line)
+        if total > max_tokens:
+            # Cut at a whole message boundary, dropping this and all older messages
+            break
+        kept.append(line)
 
-    return "\n".join(lines)
+    return "\n".join(kept)